@@ -1,16 +1,19 @@
-from fastapi import FastAPI, APIRouter, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, APIRouter, Request, Response, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
 import os
 import logging
 import asyncio
+import random
 from pathlib import Path
 from pydantic import BaseModel, Field
-from typing import List, Dict, Optional
+from typing import Any, Awaitable, Dict, Optional, Set
 import uuid
-from datetime import datetime, timedelta
-import json
+from datetime import datetime, timedelta, timezone
+import time
+import orjson
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
@@ -20,37 +23,100 @@ mongo_url = os.environ['MONGO_URL']
 client = AsyncIOMotorClient(mongo_url)
 db = client[os.environ['DB_NAME']]
 
+# JSON response rendered with orjson (bytes out, native datetime/UUID support)
+class ORJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=str, option=orjson.OPT_NON_STR_KEYS)
+
 # Create the main app without a prefix
-app = FastAPI()
+app = FastAPI(default_response_class=ORJSONResponse)
 
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
 
 # Robot state management
 class RobotState:
+    __slots__ = (
+        "_dict_cache", "_bytes_cache", "_version", "_etag_seed", "_wake", "_lock",
+        "status", "progress", "is_cleaning", "obstacle_detected",
+        "start_time", "current_mode", "pause_reason", "connected_clients"
+    )
+
+    # Fields exposed in to_dict(); assigning any of them invalidates the cached snapshot
+    SNAPSHOT_FIELDS = frozenset({
+        "status", "progress", "is_cleaning", "obstacle_detected",
+        "start_time", "current_mode", "pause_reason"
+    })
+
     def __init__(self):
+        self._dict_cache = None
+        self._bytes_cache = None
+        self._version = 0  # Bumped on every snapshot mutation; backs the /robot/status ETag
+        self._etag_seed = uuid.uuid4().hex[:8]  # Keeps ETags from matching across restarts
         self.status = "idle"  # idle, mopping, spraying, uv_disinfecting, paused
         self.progress = 0
         self.is_cleaning = False
         self.obstacle_detected = False
-        self.start_time = None
+        self.start_time = None  # Epoch seconds (time.time()) while a cycle is running
         self.current_mode = None
         self.pause_reason = None
         self.connected_clients = set()
+        self._wake = asyncio.Event()  # Set by commands to wake/preempt the simulation loop
+        self._lock = asyncio.Lock()  # Held by command handlers and the simulation while they read-modify-write
+    
+    def __setattr__(self, name, value):
+        super().__setattr__(name, value)
+        if name in self.SNAPSHOT_FIELDS:
+            self._invalidate()
+    
+    def _invalidate(self):
+        super().__setattr__("_dict_cache", None)
+        super().__setattr__("_bytes_cache", None)
+        super().__setattr__("_version", self._version + 1)
+    
+    def apply(self, **changes):
+        """Assign several snapshot fields as one transition (one invalidation, one version bump)"""
+        for name, value in changes.items():
+            if name not in self.SNAPSHOT_FIELDS:
+                raise AttributeError(f"{name} is not a robot state field")
+            super().__setattr__(name, value)
+        self._invalidate()
+    
+    @property
+    def etag(self) -> str:
+        return f'"{self._etag_seed}-{self._version}"'
     
     def to_dict(self):
-        return {
-            "status": self.status,
-            "progress": self.progress,
-            "is_cleaning": self.is_cleaning,
-            "obstacle_detected": self.obstacle_detected,
-            "start_time": self.start_time.isoformat() if self.start_time else None,
-            "current_mode": self.current_mode,
-            "pause_reason": self.pause_reason
-        }
+        """Return the state snapshot; cached until the next mutation, so don't modify it"""
+        if self._dict_cache is None:
+            self._dict_cache = {
+                "status": self.status,
+                "progress": self.progress,
+                "is_cleaning": self.is_cleaning,
+                "obstacle_detected": self.obstacle_detected,
+                "start_time": (datetime.fromtimestamp(self.start_time, tz=timezone.utc)
+                               if self.start_time is not None else None),
+                "current_mode": self.current_mode,
+                "pause_reason": self.pause_reason
+            }
+        return self._dict_cache
+    
+    def to_json_bytes(self):
+        """Return the orjson-encoded snapshot, cached alongside to_dict()"""
+        if self._bytes_cache is None:
+            self._bytes_cache = orjson.dumps(self.to_dict())
+        return self._bytes_cache
 
 robot_state = RobotState()
 
+def encode_message(message: dict) -> bytes:
+    """Encode a WebSocket frame, splicing in the cached state bytes for plain state frames"""
+    if (len(message) == 2 and "type" in message
+            and message.get("robot_state") is not None
+            and message["robot_state"] is robot_state._dict_cache):
+        return b'{"type":' + orjson.dumps(message["type"]) + b',"robot_state":' + robot_state.to_json_bytes() + b'}'
+    return orjson.dumps(message)
+
 # Models
 class CleaningLog(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -68,6 +134,12 @@ class RobotCommand(BaseModel):
     command: str  # start, stop, pause, resume
     mode: Optional[str] = "full_clean"  # full_clean, mop_only, spray_only, uv_only
 
+# Info messages for starting each cleaning mode, built once at import
+START_MSG = {
+    mode: f"Starting {mode.replace('_', ' ')} cycle..."
+    for mode in ("full_clean", "mop_only", "spray_only", "uv_only")
+}
+
 class RobotStatusUpdate(BaseModel):
     robot_id: str
     status: str
@@ -81,113 +153,248 @@ class RobotStatusUpdate(BaseModel):
 # WebSocket manager
 class ConnectionManager:
     def __init__(self):
-        self.active_connections: List[WebSocket] = []
+        self.active_connections: Set[WebSocket] = set()
+        # Serializes sends per client so concurrent broadcasts can't interleave frames
+        self.send_locks: Dict[WebSocket, asyncio.Lock] = {}
 
     async def connect(self, websocket: WebSocket):
         await websocket.accept()
-        self.active_connections.append(websocket)
+        self.send_locks[websocket] = asyncio.Lock()
+        self.active_connections.add(websocket)
 
     def disconnect(self, websocket: WebSocket):
-        if websocket in self.active_connections:
-            self.active_connections.remove(websocket)
+        self.active_connections.discard(websocket)
+        self.send_locks.pop(websocket, None)
 
-    async def send_personal_message(self, message: str, websocket: WebSocket):
+    async def send_frame(self, websocket: WebSocket, payload: bytes):
+        lock = self.send_locks.get(websocket)
+        if lock is None:
+            # Already disconnected (e.g. pruned by a failed broadcast); surface it like a closed socket
+            raise WebSocketDisconnect()
+        async with lock:
+            await websocket.send_bytes(payload)
+
+    async def send_personal_message(self, message: dict, websocket: WebSocket):
         try:
-            await websocket.send_text(message)
+            await self.send_frame(websocket, encode_message(message))
         except:
             self.disconnect(websocket)
 
-    async def broadcast(self, message: dict):
-        disconnected = []
-        for connection in self.active_connections:
-            try:
-                await connection.send_text(json.dumps(message))
-            except:
-                disconnected.append(connection)
-        
+    def queue_broadcast(self, message: dict) -> Awaitable[None]:
+        """Start sending message to every client and return an awaitable for the fan-out.
+
+        The per-client send tasks are created right here, so their order on each
+        client's FIFO send lock is fixed when this is called. Callers holding the
+        robot state lock can queue a frame and await the fan-out after releasing it.
+        """
+        global last_snapshot
+        # Encode once, then write to every client concurrently
+        payload = encode_message(message)
+        if "robot_state" in message:
+            last_snapshot = message["robot_state"]
+        # Snapshot so disconnects during the gather don't mutate what we iterate
+        connections = tuple(self.active_connections)
+        sends = asyncio.gather(
+            *[self.send_frame(connection, payload) for connection in connections],
+            return_exceptions=True
+        )
+        return self._prune_failed(connections, sends)
+
+    async def _prune_failed(self, connections, sends):
+        results = await sends
         # Remove disconnected clients
-        for conn in disconnected:
-            self.disconnect(conn)
+        for conn, result in zip(connections, results):
+            if isinstance(result, Exception):
+                self.disconnect(conn)
+
+    async def broadcast(self, message: dict):
+        await self.queue_broadcast(message)
 
 manager = ConnectionManager()
 
+# Fire-and-forget tasks; the event loop only keeps weak references, so hold them here
+background_tasks: Set[asyncio.Task] = set()
+
+def spawn(coro) -> asyncio.Task:
+    """Schedule coro in the background, keeping a reference until it finishes"""
+    task = asyncio.create_task(coro)
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+    return task
+
+# Cleaning log writer: logs are queued and written to MongoDB in batches
+LOG_BATCH_SIZE = 500
+# How long shutdown waits for queued logs to be written before giving up on them
+LOG_FLUSH_TIMEOUT = 10
+log_queue: asyncio.Queue = asyncio.Queue()
+log_flusher_task: Optional[asyncio.Task] = None
+
+def drain_log_queue(batch: list) -> list:
+    """Move queued logs into batch without waiting, up to LOG_BATCH_SIZE"""
+    try:
+        while len(batch) < LOG_BATCH_SIZE:
+            batch.append(log_queue.get_nowait())
+    except asyncio.QueueEmpty:
+        pass
+    return batch
+
+async def log_flusher():
+    """Write queued cleaning logs with insert_many, at most one batch per second"""
+    while True:
+        batch = drain_log_queue([await log_queue.get()])
+        try:
+            await db.cleaning_logs.insert_many(batch, ordered=False)
+        except Exception:
+            logger.exception("Failed to write %d cleaning logs", len(batch))
+        finally:
+            # Mark the batch handled so shutdown's log_queue.join() can return
+            for _ in batch:
+                log_queue.task_done()
+        await asyncio.sleep(1)
+
+async def ensure_indexes():
+    """Create the cleaning-logs index in the background so an unreachable DB can't block startup"""
+    try:
+        await db.cleaning_logs.create_index([("start_time", -1)])
+    except Exception:
+        logger.exception("Failed to create cleaning_logs index")
+
+# Last robot_state broadcast to every client; delta frames are computed against it
+last_snapshot: dict = {}
+
+def status_frame(events: Optional[list] = None) -> dict:
+    """Build a full status_update frame, carrying any alert/info events raised in the same tick"""
+    frame = {"type": "status_update", "robot_state": robot_state.to_dict()}
+    if events:
+        frame["events"] = events
+    return frame
+
+def delta_frame(events: Optional[list] = None) -> dict:
+    """Build a delta frame with only the state fields changed since the last broadcast"""
+    global last_snapshot
+    current = robot_state.to_dict()
+    frame = {
+        "type": "delta",
+        "changes": {k: v for k, v in current.items() if k not in last_snapshot or last_snapshot[k] != v}
+    }
+    if events:
+        frame["events"] = events
+    last_snapshot = current
+    return frame
+
+def cleaning_phase(progress: int) -> str:
+    """Map cycle progress to the active cleaning status"""
+    if progress < 30:
+        return "mopping"
+    elif progress < 60:
+        return "spraying"
+    elif progress < 90:
+        return "uv_disinfecting"
+    return "mopping"  # Final mop
+
+async def clear_obstacle_after(delay: float):
+    """Clear a detected obstacle after delay seconds and resume the cycle"""
+    await asyncio.sleep(delay)
+    async with robot_state._lock:
+        # Leave the rest of the state alone if the user stopped or resumed in the meantime
+        if not (robot_state.is_cleaning and robot_state.pause_reason == "obstacle_detected"):
+            robot_state.obstacle_detected = False
+            sent = manager.queue_broadcast(delta_frame())
+        else:
+            robot_state.apply(
+                obstacle_detected=False,
+                status=cleaning_phase(robot_state.progress),
+                pause_reason=None
+            )
+            sent = manager.queue_broadcast(delta_frame([{
+                "type": "info",
+                "message": "Path clear. Resuming cleaning..."
+            }]))
+    # Fan out after releasing the lock so a slow client can't stall commands or ticks
+    await sent
+
 # Robot simulation task
 async def robot_simulation():
     """Simulate robot cleaning cycle and obstacle detection"""
+    _rand = random.random
     while True:
-        if robot_state.is_cleaning and robot_state.status != "paused":
-            # Simulate progress
-            if robot_state.progress < 100:
-                robot_state.progress += 2  # 2% every 5 seconds = ~4 minutes total
-                
-                # Simulate mode changes during cleaning cycle
-                if robot_state.progress < 30:
-                    robot_state.status = "mopping"
-                elif robot_state.progress < 60:
-                    robot_state.status = "spraying" 
-                elif robot_state.progress < 90:
-                    robot_state.status = "uv_disinfecting"
+        # Sleep until a command starts a cycle instead of polling while idle
+        if not robot_state.is_cleaning:
+            await robot_state._wake.wait()
+            robot_state._wake.clear()
+            continue
+        
+        sent = None
+        async with robot_state._lock:
+            # Re-check under the lock: a stop command may have landed since the idle check
+            if robot_state.is_cleaning and robot_state.status != "paused":
+                # Simulate progress
+                if robot_state.progress < 100:
+                    # 2% every 5 seconds = ~4 minutes total, with mode changes during the cycle
+                    progress = robot_state.progress + 2
+                    robot_state.apply(progress=progress, status=cleaning_phase(progress))
+                    
+                    # Random obstacle detection (10% chance every 5 seconds)
+                    events = []
+                    if _rand() < 0.1 and not robot_state.obstacle_detected:
+                        robot_state.apply(
+                            obstacle_detected=True,
+                            status="paused",
+                            pause_reason="obstacle_detected"
+                        )
+                        events.append({
+                            "type": "alert",
+                            "message": "Obstacle detected! Robot paused for safety."
+                        })
+                        # Auto-resume after 3 seconds without holding up the tick loop
+                        spawn(clear_obstacle_after(3))
+                    
+                    # One delta frame per tick; skip it entirely if nothing changed
+                    frame = delta_frame(events)
+                    if events or frame["changes"]:
+                        sent = manager.queue_broadcast(frame)
                 else:
-                    robot_state.status = "mopping"  # Final mop
-                
-                # Random obstacle detection (10% chance every 5 seconds)
-                import random
-                if random.random() < 0.1 and not robot_state.obstacle_detected:
-                    robot_state.obstacle_detected = True
-                    robot_state.status = "paused"
-                    robot_state.pause_reason = "obstacle_detected"
-                    await manager.broadcast({
-                        "type": "alert",
-                        "message": "Obstacle detected! Robot paused for safety.",
-                        "robot_state": robot_state.to_dict()
-                    })
+                    # Cleaning complete
+                    robot_state.apply(is_cleaning=False, status="idle", progress=100)
+                    end_ts = time.time()
+                    duration = int(end_ts - robot_state.start_time)
+                    
+                    # Save cleaning log
+                    log = CleaningLog(
+                        start_time=datetime.fromtimestamp(robot_state.start_time, tz=timezone.utc),
+                        end_time=datetime.fromtimestamp(end_ts, tz=timezone.utc),
+                        duration=duration,
+                        mode=robot_state.current_mode,
+                        status="completed",
+                        progress=100
+                    )
+                    log_queue.put_nowait(log.dict())
                     
-                    # Auto-resume after 3 seconds
-                    await asyncio.sleep(3)
-                    robot_state.obstacle_detected = False
-                    robot_state.pause_reason = None
-                    await manager.broadcast({
-                        "type": "info", 
-                        "message": "Path clear. Resuming cleaning...",
-                        "robot_state": robot_state.to_dict()
+                    sent = manager.queue_broadcast({
+                        "type": "cleaning_complete",
+                        "message": "Cleaning cycle completed successfully!",
+                        "robot_state": robot_state.to_dict(),
+                        "duration": duration
                     })
-                
-                await manager.broadcast({
-                    "type": "status_update",
-                    "robot_state": robot_state.to_dict()
-                })
-            else:
-                # Cleaning complete
-                robot_state.is_cleaning = False
-                robot_state.status = "idle"
-                robot_state.progress = 100
-                end_time = datetime.utcnow()
-                duration = int((end_time - robot_state.start_time).total_seconds())
-                
-                # Save cleaning log
-                log = CleaningLog(
-                    start_time=robot_state.start_time,
-                    end_time=end_time,
-                    duration=duration,
-                    mode=robot_state.current_mode,
-                    status="completed",
-                    progress=100
-                )
-                await db.cleaning_logs.insert_one(log.dict())
-                
-                await manager.broadcast({
-                    "type": "cleaning_complete",
-                    "message": "Cleaning cycle completed successfully!",
-                    "robot_state": robot_state.to_dict(),
-                    "duration": duration
-                })
-                
-        await asyncio.sleep(5)  # Update every 5 seconds
+        
+        # Fan out after releasing the lock so a slow client can't stall commands
+        if sent is not None:
+            await sent
+                    
+        # Update every 5 seconds, unless a stop/pause command preempts the tick
+        try:
+            await asyncio.wait_for(robot_state._wake.wait(), timeout=5)
+            robot_state._wake.clear()
+        except asyncio.TimeoutError:
+            pass
 
-# Start simulation task
+# Start simulation and log writer tasks
 @app.on_event("startup")
 async def startup_event():
-    asyncio.create_task(robot_simulation())
+    global log_flusher_task
+    spawn(ensure_indexes())
+    spawn(robot_simulation())
+    log_flusher_task = spawn(log_flusher())
 
 # WebSocket endpoint
 @app.websocket("/api/ws")
@@ -195,16 +402,20 @@ async def websocket_endpoint(websocket: WebSocket):
     await manager.connect(websocket)
     try:
         # Send initial state
-        await websocket.send_text(json.dumps({
-            "type": "status_update",
-            "robot_state": robot_state.to_dict()
-        }))
+        await manager.send_frame(websocket, encode_message(status_frame()))
         
+        # Read raw ASGI messages so ignored client frames are never decoded
         while True:
-            data = await websocket.receive_text()
-            # Handle any websocket commands if needed
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            # Lightweight keepalive for clients that want an application-level ping
+            if message.get("bytes") == b"ping" or message.get("text") == "ping":
+                await manager.send_frame(websocket, b'{"type":"pong"}')
             
     except WebSocketDisconnect:
+        pass
+    finally:
         manager.disconnect(websocket)
 
 # API Routes
@@ -214,94 +425,117 @@ async def root():
 
 @api_router.post("/robot/command")
 async def send_robot_command(command: RobotCommand):
-    if command.command == "start":
-        if not robot_state.is_cleaning:
-            robot_state.is_cleaning = True
-            robot_state.status = "mopping"
-            robot_state.progress = 0
-            robot_state.start_time = datetime.utcnow()
-            robot_state.current_mode = command.mode
-            
-            await manager.broadcast({
-                "type": "info",
-                "message": f"Starting {command.mode.replace('_', ' ')} cycle...",
-                "robot_state": robot_state.to_dict()
-            })
-            
-            return {"success": True, "message": "Cleaning started", "robot_state": robot_state.to_dict()}
-        else:
-            return {"success": False, "message": "Robot is already cleaning"}
-            
-    elif command.command == "stop":
-        if robot_state.is_cleaning:
-            robot_state.is_cleaning = False
-            robot_state.status = "idle"
-            end_time = datetime.utcnow()
-            duration = int((end_time - robot_state.start_time).total_seconds())
-            
-            # Save interrupted cleaning log
-            log = CleaningLog(
-                start_time=robot_state.start_time,
-                end_time=end_time,
-                duration=duration,
-                mode=robot_state.current_mode,
-                status="interrupted",
-                progress=robot_state.progress
-            )
-            await db.cleaning_logs.insert_one(log.dict())
-            
-            robot_state.progress = 0
-            robot_state.start_time = None
-            robot_state.current_mode = None
-            
-            await manager.broadcast({
-                "type": "info",
-                "message": "Cleaning stopped by user",
-                "robot_state": robot_state.to_dict()
-            })
-            
-            return {"success": True, "message": "Cleaning stopped", "robot_state": robot_state.to_dict()}
+    # Check-and-transition under the state lock so commands can't race the simulation;
+    # the frame is queued under the lock but the fan-out is awaited after releasing it
+    async with robot_state._lock:
+        if command.command == "start":
+            if not robot_state.is_cleaning:
+                robot_state.apply(
+                    is_cleaning=True,
+                    status="mopping",
+                    progress=0,
+                    start_time=time.time(),
+                    current_mode=command.mode
+                )
+                robot_state._wake.set()
+                
+                sent = manager.queue_broadcast({
+                    "type": "info",
+                    "message": START_MSG.get(command.mode, "Starting cycle..."),
+                    "robot_state": robot_state.to_dict()
+                })
+                
+                result = {"success": True, "message": "Cleaning started", "robot_state": robot_state.to_dict()}
+            else:
+                return {"success": False, "message": "Robot is already cleaning"}
+                
+        elif command.command == "stop":
+            if robot_state.is_cleaning:
+                end_ts = time.time()
+                duration = int(end_ts - robot_state.start_time)
+                
+                # Save interrupted cleaning log
+                log = CleaningLog(
+                    start_time=datetime.fromtimestamp(robot_state.start_time, tz=timezone.utc),
+                    end_time=datetime.fromtimestamp(end_ts, tz=timezone.utc),
+                    duration=duration,
+                    mode=robot_state.current_mode,
+                    status="interrupted",
+                    progress=robot_state.progress
+                )
+                log_queue.put_nowait(log.dict())
+                
+                robot_state.apply(
+                    is_cleaning=False,
+                    status="idle",
+                    progress=0,
+                    start_time=None,
+                    current_mode=None
+                )
+                robot_state._wake.set()
+                
+                sent = manager.queue_broadcast({
+                    "type": "info",
+                    "message": "Cleaning stopped by user",
+                    "robot_state": robot_state.to_dict()
+                })
+                
+                result = {"success": True, "message": "Cleaning stopped", "robot_state": robot_state.to_dict()}
+            else:
+                return {"success": False, "message": "Robot is not cleaning"}
+        
+        elif command.command == "pause":
+            if robot_state.is_cleaning and robot_state.status != "paused":
+                robot_state.apply(status="paused", pause_reason="user_request")
+                robot_state._wake.set()
+                
+                sent = manager.queue_broadcast({
+                    "type": "info",
+                    "message": "Cleaning paused by user",
+                    "robot_state": robot_state.to_dict()
+                })
+                
+                result = {"success": True, "message": "Cleaning paused", "robot_state": robot_state.to_dict()}
+            else:
+                return {"success": False, "message": "Cannot pause robot"}
+                
+        elif command.command == "resume":
+            if robot_state.is_cleaning and robot_state.status == "paused":
+                robot_state.apply(status="mopping", pause_reason=None)  # Resume with appropriate status
+                
+                sent = manager.queue_broadcast({
+                    "type": "info",
+                    "message": "Cleaning resumed",
+                    "robot_state": robot_state.to_dict()
+                })
+                
+                result = {"success": True, "message": "Cleaning resumed", "robot_state": robot_state.to_dict()}
+            else:
+                return {"success": False, "message": "Cannot resume robot"}
         else:
-            return {"success": False, "message": "Robot is not cleaning"}
+            return None
     
-    elif command.command == "pause":
-        if robot_state.is_cleaning and robot_state.status != "paused":
-            robot_state.status = "paused"
-            robot_state.pause_reason = "user_request"
-            
-            await manager.broadcast({
-                "type": "info",
-                "message": "Cleaning paused by user",
-                "robot_state": robot_state.to_dict()
-            })
-            
-            return {"success": True, "message": "Cleaning paused", "robot_state": robot_state.to_dict()}
-        else:
-            return {"success": False, "message": "Cannot pause robot"}
-            
-    elif command.command == "resume":
-        if robot_state.is_cleaning and robot_state.status == "paused":
-            robot_state.status = "mopping"  # Resume with appropriate status
-            robot_state.pause_reason = None
-            
-            await manager.broadcast({
-                "type": "info",
-                "message": "Cleaning resumed",
-                "robot_state": robot_state.to_dict()
-            })
-            
-            return {"success": True, "message": "Cleaning resumed", "robot_state": robot_state.to_dict()}
-        else:
-            return {"success": False, "message": "Cannot resume robot"}
+    await sent
+    return result
 
 @api_router.get("/robot/status")
-async def get_robot_status():
-    return {"robot_state": robot_state.to_dict()}
+async def get_robot_status(request: Request):
+    etag = robot_state.etag
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(
+        content=b'{"robot_state":' + robot_state.to_json_bytes() + b'}',
+        media_type="application/json",
+        headers=headers
+    )
 
-@api_router.get("/cleaning-logs", response_model=List[CleaningLog])
+@api_router.get("/cleaning-logs", response_model=None)
 async def get_cleaning_logs():
-    logs = await db.cleaning_logs.find().sort("start_time", -1).to_list(100)
-    return [CleaningLog(**log) for log in logs]
+    # Documents were written from CleaningLog, so hand them straight to orjson
+    # rather than revalidating and re-encoding each one
+    cursor = db.cleaning_logs.find({}, projection={"_id": 0}).sort("start_time", -1).limit(100)
+    return ORJSONResponse(await cursor.to_list(100))
 
 # Include the router in the main app
 app.include_router(api_router)
@@ -323,4 +557,21 @@ logger = logging.getLogger(__name__)
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
-    client.close()
\ No newline at end of file
+    try:
+        # Let the flusher finish its in-flight batch and anything still queued, then stop it
+        await asyncio.wait_for(log_queue.join(), timeout=LOG_FLUSH_TIMEOUT)
+    except asyncio.TimeoutError:
+        logger.error("Dropping %d cleaning logs not written before shutdown", log_queue.qsize())
+    except Exception:
+        logger.exception("Failed to flush cleaning logs at shutdown")
+    finally:
+        if log_flusher_task is not None:
+            log_flusher_task.cancel()
+            await asyncio.gather(log_flusher_task, return_exceptions=True)
+        client.close()
+
+if __name__ == "__main__":
+    import uvicorn
+
+    # uvicorn's default "auto" loop/http pick uvloop + httptools when installed, asyncio/h11 otherwise (e.g. Windows)
+    uvicorn.run(app, host="0.0.0.0", port=int(os.environ.get("PORT", 8001)))
@@ -1,6 +1,6 @@
-import requests
+import asyncio
+import httpx
 import sys
-import time
 import json
 from datetime import datetime
 
@@ -10,52 +10,53 @@ class RobotAPITester:
         self.api_url = f"{base_url}/api"
         self.tests_run = 0
         self.tests_passed = 0
+        # One pooled async client so every test reuses the same keep-alive connection
+        self.client = httpx.AsyncClient(headers={'Content-Type': 'application/json'}, timeout=10)
 
-    def run_test(self, name, method, endpoint, expected_status, data=None):
+    async def run_test(self, name, method, endpoint, expected_status, data=None):
         """Run a single API test"""
         url = f"{self.api_url}/{endpoint}" if endpoint else f"{self.api_url}/"
-        headers = {'Content-Type': 'application/json'}
 
         self.tests_run += 1
         print(f"\n🔍 Testing {name}...")
         
         try:
             if method == 'GET':
-                response = requests.get(url, headers=headers, timeout=10)
+                response = await self.client.get(url)
             elif method == 'POST':
-                response = requests.post(url, json=data, headers=headers, timeout=10)
+                response = await self.client.post(url, json=data)
 
             success = response.status_code == expected_status
             if success:
                 self.tests_passed += 1
-                print(f"✅ Passed - Status: {response.status_code}")
+                print(f"✅ {name}: Passed - Status: {response.status_code}")
                 try:
                     response_data = response.json()
-                    print(f"   Response: {json.dumps(response_data, indent=2)}")
+                    print(f"   {name} response: {json.dumps(response_data, indent=2)}")
                     return True, response_data
                 except:
-                    print(f"   Response: {response.text}")
+                    print(f"   {name} response: {response.text}")
                     return True, {}
             else:
-                print(f"❌ Failed - Expected {expected_status}, got {response.status_code}")
-                print(f"   Response: {response.text}")
+                print(f"❌ {name}: Failed - Expected {expected_status}, got {response.status_code}")
+                print(f"   {name} response: {response.text}")
                 return False, {}
 
         except Exception as e:
-            print(f"❌ Failed - Error: {str(e)}")
+            print(f"❌ {name}: Failed - Error: {str(e)}")
             return False, {}
 
-    def test_health_check(self):
+    async def test_health_check(self):
         """Test API health check"""
-        return self.run_test("Health Check", "GET", "", 200)
+        return await self.run_test("Health Check", "GET", "", 200)
 
-    def test_robot_status(self):
+    async def test_robot_status(self):
         """Test getting robot status"""
-        return self.run_test("Get Robot Status", "GET", "robot/status", 200)
+        return await self.run_test("Get Robot Status", "GET", "robot/status", 200)
 
-    def test_start_cleaning(self, mode="full_clean"):
+    async def test_start_cleaning(self, mode="full_clean"):
         """Test starting cleaning cycle"""
-        return self.run_test(
+        return await self.run_test(
             f"Start Cleaning ({mode})",
             "POST",
             "robot/command",
@@ -63,9 +64,9 @@ class RobotAPITester:
             data={"command": "start", "mode": mode}
         )
 
-    def test_pause_cleaning(self):
+    async def test_pause_cleaning(self):
         """Test pausing cleaning cycle"""
-        return self.run_test(
+        return await self.run_test(
             "Pause Cleaning",
             "POST", 
             "robot/command",
@@ -73,9 +74,9 @@ class RobotAPITester:
             data={"command": "pause"}
         )
 
-    def test_resume_cleaning(self):
+    async def test_resume_cleaning(self):
         """Test resuming cleaning cycle"""
-        return self.run_test(
+        return await self.run_test(
             "Resume Cleaning",
             "POST",
             "robot/command", 
@@ -83,9 +84,9 @@ class RobotAPITester:
             data={"command": "resume"}
         )
 
-    def test_stop_cleaning(self):
+    async def test_stop_cleaning(self):
         """Test stopping cleaning cycle"""
-        return self.run_test(
+        return await self.run_test(
             "Stop Cleaning",
             "POST",
             "robot/command",
@@ -93,13 +94,13 @@ class RobotAPITester:
             data={"command": "stop"}
         )
 
-    def test_cleaning_logs(self):
+    async def test_cleaning_logs(self):
         """Test getting cleaning logs"""
-        return self.run_test("Get Cleaning Logs", "GET", "cleaning-logs", 200)
+        return await self.run_test("Get Cleaning Logs", "GET", "cleaning-logs", 200)
 
-    def test_invalid_command(self):
+    async def test_invalid_command(self):
         """Test invalid robot command"""
-        return self.run_test(
+        return await self.run_test(
             "Invalid Command",
             "POST",
             "robot/command",
@@ -107,74 +108,76 @@ class RobotAPITester:
             data={"command": "invalid_command"}
         )
 
-def main():
+async def main():
     print("🤖 Starting Robot Control API Tests")
     print("=" * 50)
     
     tester = RobotAPITester()
-    
-    # Test 1: Health check
-    success, _ = tester.test_health_check()
+    async with tester.client:
+        return await run_all_tests(tester)
+
+async def run_all_tests(tester):
+    # Tests 1-4: independent read-only checks run concurrently
+    health, initial, _, _ = await asyncio.gather(
+        tester.test_health_check(),
+        tester.test_robot_status(),
+        tester.test_cleaning_logs(),
+        tester.test_invalid_command()
+    )
+    success, _ = health
     if not success:
         print("❌ Health check failed, stopping tests")
         return 1
 
-    # Test 2: Get initial robot status
-    success, initial_status = tester.test_robot_status()
+    success, initial_status = initial
     if success:
         print(f"   Initial robot state: {initial_status.get('robot_state', {}).get('status', 'unknown')}")
 
-    # Test 3: Get cleaning logs (should work even if empty)
-    tester.test_cleaning_logs()
-
-    # Test 4: Start cleaning cycle
-    success, start_response = tester.test_start_cleaning("full_clean")
+    # Test 5: Start cleaning cycle
+    success, start_response = await tester.test_start_cleaning("full_clean")
     if success:
         print("   Cleaning started successfully")
         
         # Wait a bit for the robot to start
         print("   Waiting 3 seconds for robot to start...")
-        time.sleep(3)
+        await asyncio.sleep(3)
         
-        # Test 5: Check status during cleaning
-        success, status_response = tester.test_robot_status()
+        # Test 6: Check status during cleaning
+        success, status_response = await tester.test_robot_status()
         if success:
             robot_state = status_response.get('robot_state', {})
             print(f"   Robot status during cleaning: {robot_state.get('status')}")
             print(f"   Progress: {robot_state.get('progress')}%")
             print(f"   Is cleaning: {robot_state.get('is_cleaning')}")
 
-        # Test 6: Pause cleaning
-        success, _ = tester.test_pause_cleaning()
+        # Test 7: Pause cleaning
+        success, _ = await tester.test_pause_cleaning()
         if success:
-            time.sleep(1)
+            await asyncio.sleep(1)
             
-            # Test 7: Resume cleaning
-            success, _ = tester.test_resume_cleaning()
+            # Test 8: Resume cleaning
+            success, _ = await tester.test_resume_cleaning()
             if success:
-                time.sleep(1)
+                await asyncio.sleep(1)
                 
-                # Test 8: Stop cleaning
-                tester.test_stop_cleaning()
+                # Test 9: Stop cleaning
+                await tester.test_stop_cleaning()
 
-    # Test 9: Try different cleaning modes
+    # Test 10: Try different cleaning modes
     print("\n🔄 Testing different cleaning modes...")
     for mode in ["mop_only", "spray_only", "uv_only"]:
-        success, _ = tester.test_start_cleaning(mode)
+        success, _ = await tester.test_start_cleaning(mode)
         if success:
-            time.sleep(1)
-            tester.test_stop_cleaning()
-            time.sleep(1)
-
-    # Test 10: Test invalid command
-    tester.test_invalid_command()
+            await asyncio.sleep(1)
+            await tester.test_stop_cleaning()
+            await asyncio.sleep(1)
 
     # Test 11: Test edge cases
     print("\n🧪 Testing edge cases...")
     
     # Try to pause when not cleaning
     print("\n🔍 Testing pause when not cleaning...")
-    success, response = tester.run_test(
+    success, response = await tester.run_test(
         "Pause When Not Cleaning",
         "POST",
         "robot/command",
@@ -186,7 +189,7 @@ def main():
     
     # Try to resume when not paused
     print("\n🔍 Testing resume when not paused...")
-    success, response = tester.run_test(
+    success, response = await tester.run_test(
         "Resume When Not Paused", 
         "POST",
         "robot/command",
@@ -209,4 +212,4 @@ def main():
         return 1
 
 if __name__ == "__main__":
-    sys.exit(main())
\ No newline at end of file
+    sys.exit(asyncio.run(main()))
\ No newline at end of file
@@ -5,6 +5,7 @@ import axios from "axios";
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
 const API = `${BACKEND_URL}/api`;
 const WS_URL = BACKEND_URL.replace('https://', 'wss://').replace('http://', 'ws://');
+const textDecoder = new TextDecoder();
 
 function App() {
   const [robotState, setRobotState] = useState({
@@ -40,16 +41,25 @@ function App() {
   const connectWebSocket = () => {
     try {
       wsRef.current = new WebSocket(`${WS_URL}/api/ws`);
+      wsRef.current.binaryType = "arraybuffer"; // Server sends orjson-encoded binary frames
       
       wsRef.current.onopen = () => {
         console.log("WebSocket connected");
       };
       
       wsRef.current.onmessage = (event) => {
-        const data = JSON.parse(event.data);
+        const raw = typeof event.data === "string" ? event.data : textDecoder.decode(event.data);
+        const data = JSON.parse(raw);
         
-        if (data.type === "status_update") {
-          setRobotState(data.robot_state);
+        if (data.type === "status_update" || data.type === "delta") {
+          // Full state on connect; afterwards only the fields that changed
+          if (data.type === "delta") {
+            setRobotState(prev => ({ ...prev, ...data.changes }));
+          } else {
+            setRobotState(data.robot_state);
+          }
+          // Alerts/info raised during the same simulation tick arrive in one frame
+          (data.events || []).forEach(e => addNotification(e.message, e.type));
         } else if (data.type === "alert" || data.type === "info" || data.type === "cleaning_complete") {
           addNotification(data.message, data.type);
           if (data.robot_state) {
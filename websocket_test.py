@@ -1,39 +1,94 @@
 import asyncio
+import re
 import websockets
-import json
-import requests
-import time
+import orjson
+import httpx
 from datetime import datetime
+from urllib.parse import urlsplit, urlunsplit
+
+try:
+    import uvloop
+except ImportError:  # uvloop isn't available on Windows; fall back to the stdlib loop
+    uvloop = None
+
+# Keyword scans for test_obstacle_detection. The bytes patterns prefilter raw frames
+# so most can be skipped without parsing; (?!_) keeps the "obstacle_detected" state
+# field from matching. The str patterns check a decoded event's message.
+_OBSTACLE_RAW = re.compile(rb'obstacle(?!_)', re.I).search
+_RESUMING_RAW = re.compile(rb'resuming', re.I).search
+_OBSTACLE_MSG = re.compile('obstacle', re.I).search
+_RESUMING_MSG = re.compile('resuming', re.I).search
+
+# Peeks a raw frame's "type" without decoding the whole JSON document
+_FRAME_TYPE_RE = re.compile(rb'"type"\s*:\s*"([a-z_]+)"')
+
+def frame_type(message):
+    """Return the type of a raw frame, or None if it has none"""
+    match = _FRAME_TYPE_RE.search(message, 0, 64)
+    return match.group(1).decode() if match else None
 
 class WebSocketTester:
     def __init__(self, base_url="https://cacf2a31-9e35-4049-85ee-3b36c7bcc84a.preview.emergentagent.com"):
         self.base_url = base_url
-        self.api_url = f"{base_url}/api"
-        self.ws_url = base_url.replace('https://', 'wss://').replace('http://', 'ws://') + "/api/ws"
+        # Parse once and swap only the scheme, so an "http://" elsewhere in the URL is left alone
+        parts = urlsplit(base_url)
+        ws_scheme = 'wss' if parts.scheme == 'https' else 'ws'
+        base_path = parts.path.rstrip('/')
+        self.api_url = urlunsplit((parts.scheme, parts.netloc, base_path + '/api', '', ''))
+        self.ws_url = urlunsplit((ws_scheme, parts.netloc, base_path + '/api/ws', '', ''))
         self.messages_received = []
         self.tests_run = 0
         self.tests_passed = 0
+        self._trace = []  # Lines recorded inside recv loops, printed once the loop ends
+        # The backend drives a single robot, so tests that start/stop it must take turns
+        self.robot_lock = asyncio.Lock()
+        # Pooled async client: control-plane POSTs reuse one keep-alive connection
+        # and never block the event loop while sockets are being drained
+        self.http = httpx.AsyncClient(headers={'Content-Type': 'application/json'}, timeout=10)
+
+    async def send_command(self, command):
+        """POST a robot command"""
+        return await self.http.post(f"{self.api_url}/robot/command", content=orjson.dumps(command))
+
+    def connect(self):
+        """Open a client WebSocket without permessage-deflate"""
+        # Frames are small binary JSON, so compression only costs zlib time and
+        # there is no text-frame UTF-8 validation to pay for
+        return websockets.connect(self.ws_url, compression=None, max_size=2**20, open_timeout=10)
+
+    def trace(self, template, *args):
+        """Record a line for later instead of printing from the hot recv loop"""
+        self._trace.append((template, args))
+
+    def flush_trace(self):
+        """Print and clear the lines recorded by trace()"""
+        for template, args in self._trace:
+            print(template.format(*args))
+        self._trace.clear()
+
+    # Indexed by the test's success flag (False -> 0, True -> 1)
+    _STATUS_ICON = ("❌", "✅")
+    _STATUS_TEXT = ("FAILED", "PASSED")
 
     def log_test(self, name, success, details=""):
         """Log test results"""
+        success = bool(success)
         self.tests_run += 1
-        if success:
-            self.tests_passed += 1
-            print(f"✅ {name} - PASSED {details}")
-        else:
-            print(f"❌ {name} - FAILED {details}")
+        self.tests_passed += success
+        print(f"{self._STATUS_ICON[success]} {name} - {self._STATUS_TEXT[success]} {details}")
 
     async def test_websocket_connection(self):
         """Test basic WebSocket connection"""
         print("\n🔌 Testing WebSocket Connection...")
         try:
-            async with websockets.connect(self.ws_url) as websocket:
+            async with self.connect() as websocket:
+                recv = websocket.recv
                 print(f"   Connected to: {self.ws_url}")
                 
                 # Wait for initial message
                 try:
-                    message = await asyncio.wait_for(websocket.recv(), timeout=5)
-                    data = json.loads(message)
+                    message = await asyncio.wait_for(recv(), timeout=5)
+                    data = orjson.loads(message)
                     print(f"   Initial message received: {data}")
                     
                     if data.get('type') == 'status_update' and 'robot_state' in data:
@@ -51,20 +106,79 @@ class WebSocketTester:
             self.log_test("WebSocket Connection & Initial State", False, f"- Connection error: {str(e)}")
             return False
 
+    # Frame handlers for test_real_time_updates, dispatched on the frame's 'type'.
+    # `state` is the client's merged view of the robot: full robot_state frames
+    # replace it and delta frames update only the fields that changed.
+    @staticmethod
+    def _merge_state(data, state, add_status, add_progress):
+        robot_state = data.get('robot_state')
+        if robot_state is not None:
+            state.clear()
+            state.update(robot_state)
+        elif 'changes' in data:
+            state.update(data['changes'])
+        else:
+            return
+        
+        status = state.get('status')
+        progress = state.get('progress')
+        if status:
+            add_status(status)
+        if progress is not None:
+            add_progress(progress)
+
+    def _on_state(self, data, state, add_status, add_progress):
+        self._merge_state(data, state, add_status, add_progress)
+        for event in data.get('events', ()):
+            self.trace("   📣 {} received: {}", event.get('type'), event.get('message'))
+
+    def _on_alert(self, data, state, add_status, add_progress):
+        self._merge_state(data, state, add_status, add_progress)
+        self.trace("   🚨 Alert received: {}", data.get('message'))
+
+    def _on_info(self, data, state, add_status, add_progress):
+        self._merge_state(data, state, add_status, add_progress)
+        self.trace("   ℹ️  Info received: {}", data.get('message'))
+
+    _UPDATE_HANDLERS = {
+        'status_update': _on_state,
+        'delta': _on_state,
+        'alert': _on_alert,
+        'info': _on_info,
+    }
+
+    # Event handlers for test_obstacle_detection; each records what it saw in `found`
+    def _on_obstacle_alert(self, event, found):
+        message = event.get('message', '')
+        if _OBSTACLE_MSG(message):
+            self.trace("   🚨 Obstacle detected: {}", message)
+            found.add('obstacle')
+
+    def _on_resume_info(self, event, found):
+        message = event.get('message', '')
+        if _RESUMING_MSG(message):
+            self.trace("   ✅ Auto-resume detected: {}", message)
+            found.add('resumed')
+
+    _OBSTACLE_HANDLERS = {
+        'alert': _on_obstacle_alert,
+        'info': _on_resume_info,
+    }
+
     async def test_real_time_updates(self):
         """Test real-time progress updates during cleaning"""
         print("\n📊 Testing Real-time Updates...")
         
         try:
-            async with websockets.connect(self.ws_url) as websocket:
-                # Skip initial message
-                await websocket.recv()
-                
-                # Start cleaning via API
+            async with self.connect() as websocket:
+                recv = websocket.recv
+                # Read the initial state while starting cleaning via API; the server sends the
+                # initial frame on accept, so it is already in flight before the POST lands
                 print("   Starting cleaning cycle...")
-                response = requests.post(f"{self.api_url}/robot/command", 
-                                       json={"command": "start", "mode": "full_clean"},
-                                       timeout=10)
+                initial, response = await asyncio.gather(
+                    recv(),
+                    self.send_command({"command": "start", "mode": "full_clean"})
+                )
                 
                 if response.status_code != 200:
                     self.log_test("Real-time Updates", False, "- Failed to start cleaning")
@@ -74,43 +188,38 @@ class WebSocketTester:
                 updates_received = 0
                 status_changes = set()
                 progress_updates = []
+                # Merged robot state, seeded from the initial full-state frame
+                state = dict(orjson.loads(initial).get('robot_state') or {})
                 
                 print("   Listening for real-time updates...")
-                start_time = time.time()
                 
-                while time.time() - start_time < 20:  # Listen for 20 seconds
-                    try:
-                        message = await asyncio.wait_for(websocket.recv(), timeout=2)
-                        data = json.loads(message)
-                        updates_received += 1
-                        
-                        print(f"   Update {updates_received}: {data}")
-                        
-                        if data.get('type') == 'status_update':
-                            robot_state = data.get('robot_state', {})
-                            status = robot_state.get('status')
-                            progress = robot_state.get('progress', 0)
+                # Bind hot-loop lookups to locals once
+                _loads = orjson.loads
+                _add, _append = status_changes.add, progress_updates.append
+                _trace, _handler_for = self.trace, self._UPDATE_HANDLERS.get
+                
+                # One timer for the whole window rather than one per recv
+                try:
+                    async with asyncio.timeout(20):  # Listen for 20 seconds
+                        async for message in websocket:
+                            data = _loads(message)
+                            updates_received += 1
                             
-                            if status:
-                                status_changes.add(status)
-                            if progress is not None:
-                                progress_updates.append(progress)
-                        
-                        elif data.get('type') == 'alert':
-                            print(f"   🚨 Alert received: {data.get('message')}")
+                            _trace("   Update {}: {}", updates_received, data)
                             
-                        elif data.get('type') == 'info':
-                            print(f"   ℹ️  Info received: {data.get('message')}")
+                            handler = _handler_for(data.get('type'))
+                            if handler:
+                                handler(self, data, state, _add, _append)
                             
-                    except asyncio.TimeoutError:
-                        continue
-                    except Exception as e:
-                        print(f"   Error receiving message: {e}")
-                        break
+                except TimeoutError:
+                    pass  # Listening window over
+                except Exception as e:
+                    self.trace("   Error receiving message: {}", e)
+                
+                self.flush_trace()
                 
                 # Stop cleaning
-                requests.post(f"{self.api_url}/robot/command", 
-                            json={"command": "stop"}, timeout=10)
+                await self.send_command({"command": "stop"})
                 
                 # Analyze results
                 print(f"   Updates received: {updates_received}")
@@ -136,14 +245,13 @@ class WebSocketTester:
         print("\n🚧 Testing Obstacle Detection...")
         
         try:
-            async with websockets.connect(self.ws_url) as websocket:
-                # Skip initial message
-                await websocket.recv()
-                
-                # Start cleaning
-                response = requests.post(f"{self.api_url}/robot/command", 
-                                       json={"command": "start", "mode": "full_clean"},
-                                       timeout=10)
+            async with self.connect() as websocket:
+                recv = websocket.recv
+                # Skip initial message while starting cleaning
+                _, response = await asyncio.gather(
+                    recv(),
+                    self.send_command({"command": "start", "mode": "full_clean"})
+                )
                 
                 if response.status_code != 200:
                     self.log_test("Obstacle Detection", False, "- Failed to start cleaning")
@@ -151,35 +259,41 @@ class WebSocketTester:
                 
                 # Listen for obstacle detection (may take up to 50 seconds with 10% chance every 5 seconds)
                 print("   Listening for obstacle detection (up to 30 seconds)...")
-                start_time = time.time()
-                obstacle_detected = False
-                auto_resumed = False
+                found = set()
                 
-                while time.time() - start_time < 30:
-                    try:
-                        message = await asyncio.wait_for(websocket.recv(), timeout=2)
-                        data = json.loads(message)
-                        
-                        if data.get('type') == 'alert' and 'obstacle' in data.get('message', '').lower():
-                            print(f"   🚨 Obstacle detected: {data.get('message')}")
-                            obstacle_detected = True
+                # Bind hot-loop lookups to locals once
+                _loads = orjson.loads
+                _handler_for = self._OBSTACLE_HANDLERS.get
+                
+                # One timer for the whole window rather than one per recv
+                try:
+                    async with asyncio.timeout(30):
+                        async for message in websocket:
+                            # Most frames are plain state updates; only parse ones naming a keyword
+                            if not (_OBSTACLE_RAW(message) or _RESUMING_RAW(message)):
+                                continue
+                            data = _loads(message)
                             
-                        elif data.get('type') == 'info' and 'resuming' in data.get('message', '').lower():
-                            print(f"   ✅ Auto-resume detected: {data.get('message')}")
-                            auto_resumed = True
+                            # Alerts/info arrive either on their own or batched into a state frame
+                            for event in [data] + data.get('events', []):
+                                handler = _handler_for(event.get('type'))
+                                if handler:
+                                    handler(self, event, found)
                             
-                        if obstacle_detected and auto_resumed:
-                            break
+                            if len(found) == 2:
+                                break
                             
-                    except asyncio.TimeoutError:
-                        continue
-                    except Exception as e:
-                        print(f"   Error: {e}")
-                        break
+                except TimeoutError:
+                    pass  # Listening window over
+                except Exception as e:
+                    self.trace("   Error: {}", e)
+                
+                self.flush_trace()
+                obstacle_detected = 'obstacle' in found
+                auto_resumed = 'resumed' in found
                 
                 # Stop cleaning
-                requests.post(f"{self.api_url}/robot/command", 
-                            json={"command": "stop"}, timeout=10)
+                await self.send_command({"command": "stop"})
                 
                 if obstacle_detected and auto_resumed:
                     self.log_test("Obstacle Detection", True, "- Obstacle detected and auto-resumed")
@@ -201,19 +315,18 @@ class WebSocketTester:
         
         try:
             # Connect two clients
-            async with websockets.connect(self.ws_url) as ws1, \
-                       websockets.connect(self.ws_url) as ws2:
+            async with self.connect() as ws1, \
+                       self.connect() as ws2:
+                recv1, recv2 = ws1.recv, ws2.recv
                 
                 print("   Two clients connected")
                 
-                # Skip initial messages
-                await ws1.recv()
-                await ws2.recv()
-                
-                # Start cleaning
-                response = requests.post(f"{self.api_url}/robot/command", 
-                                       json={"command": "start", "mode": "mop_only"},
-                                       timeout=10)
+                # Skip initial messages while starting cleaning
+                _, _, response = await asyncio.gather(
+                    recv1(),
+                    recv2(),
+                    self.send_command({"command": "start", "mode": "mop_only"})
+                )
                 
                 if response.status_code != 200:
                     self.log_test("Multiple Clients", False, "- Failed to start cleaning")
@@ -221,20 +334,20 @@ class WebSocketTester:
                 
                 # Both clients should receive the same updates
                 try:
-                    msg1 = await asyncio.wait_for(ws1.recv(), timeout=5)
-                    msg2 = await asyncio.wait_for(ws2.recv(), timeout=5)
+                    msg1, msg2 = await asyncio.gather(
+                        asyncio.wait_for(recv1(), timeout=5),
+                        asyncio.wait_for(recv2(), timeout=5)
+                    )
                     
-                    data1 = json.loads(msg1)
-                    data2 = json.loads(msg2)
-                    
-                    print(f"   Client 1 received: {data1}")
-                    print(f"   Client 2 received: {data2}")
+                    # The server encodes a broadcast once and sends the same bytes to every
+                    # client, so compare raw frames and only peek at the type for the log
+                    print(f"   Client 1 received: {frame_type(msg1)} frame ({len(msg1)} bytes)")
+                    print(f"   Client 2 received: {frame_type(msg2)} frame ({len(msg2)} bytes)")
                     
                     # Stop cleaning
-                    requests.post(f"{self.api_url}/robot/command", 
-                                json={"command": "stop"}, timeout=10)
+                    await self.send_command({"command": "stop"})
                     
-                    if data1 == data2:
+                    if msg1 == msg2:
                         self.log_test("Multiple Clients", True, "- Both clients received identical updates")
                         return True
                     else:
@@ -249,22 +362,27 @@ class WebSocketTester:
             self.log_test("Multiple Clients", False, f"- Error: {str(e)}")
             return False
 
+    async def run_exclusive(self, test):
+        """Run a test that drives the robot while holding robot_lock (FIFO, so order is kept)"""
+        async with self.robot_lock:
+            return await test()
+
     async def run_all_tests(self):
         """Run all WebSocket tests"""
         print("🔌 Starting WebSocket Tests")
         print("=" * 50)
         
-        # Test 1: Basic connection
-        await self.test_websocket_connection()
-        
-        # Test 2: Real-time updates
-        await self.test_real_time_updates()
-        
-        # Test 3: Obstacle detection (optional due to randomness)
-        await self.test_obstacle_detection()
-        
-        # Test 4: Multiple clients
-        await self.test_multiple_clients()
+        # Test 1 (basic connection) is read-only and overlaps the others.
+        # Tests 2-4 (real-time updates, obstacle detection - optional due to
+        # randomness - and multiple clients) start and stop the shared robot,
+        # so they run one after another in this order
+        await asyncio.gather(
+            self.test_websocket_connection(),
+            self.run_exclusive(self.test_real_time_updates),
+            self.run_exclusive(self.test_obstacle_detection),
+            self.run_exclusive(self.test_multiple_clients),
+            return_exceptions=True
+        )
         
         # Results
         print("\n📊 WebSocket Test Results:")
@@ -280,9 +398,12 @@ class WebSocketTester:
 
 async def main():
     tester = WebSocketTester()
-    success = await tester.run_all_tests()
+    async with tester.http:
+        success = await tester.run_all_tests()
     return 0 if success else 1
 
 if __name__ == "__main__":
     import sys
+    if uvloop is not None:
+        uvloop.install()
     sys.exit(asyncio.run(main()))
\ No newline at end of file